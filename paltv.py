@@ -1,12 +1,88 @@
 #!/usr/bin/env python3
 import sys
-import random
 import ctypes
 import sdl2
 import sdl2.ext
 import time
+import multiprocessing
+from multiprocessing import shared_memory
 import numpy as np
-from numba import jit, uint32, int32, float32
+
+# -----------------------------------------------------------------------------
+# Noise generation: runs in a worker process, writing into shared memory.
+
+# Generates a mask to add noise. 1s in the high bits (and the alpha channel),
+# random noise in the low order bits.
+def make_noise_mask(rng, out):
+    noise = rng.integers(0, 1 << 32, out.shape, dtype=np.uint32)
+    np.bitwise_or(noise, np.uint32(0xFFC0C0C0), out=out)
+
+
+# Worker process loop: fills the two shared noise buffers in turn, waiting for
+# the display to hand each one back before drawing into it again.
+def produce_noise(shm_name, shape, ready, free, stop):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        buffers = np.ndarray((2,) + shape, dtype=np.uint32, buffer=shm.buf)
+        rng = np.random.default_rng()
+        index = 0
+        while not stop.is_set():
+            if not free[index].wait(0.1):
+                continue
+            free[index].clear()
+            make_noise_mask(rng, buffers[index])
+            ready[index].set()
+            index ^= 1
+        del buffers
+    finally:
+        shm.close()
+
+
+# -----------------------------------------------------------------------------
+# NoiseProducer class: Generates noise masks in a worker process, double
+# buffered in shared memory so the next mask is made while a frame is drawn.
+class NoiseProducer:
+    def __init__(self, shape):
+        self.shm = shared_memory.SharedMemory(create=True, size=2 * shape[0] * shape[1] * 4)
+        self.buffers = np.ndarray((2,) + shape, dtype=np.uint32, buffer=self.shm.buf)
+        
+        # ready: buffer holds a finished mask; free: buffer may be redrawn
+        self.ready = [multiprocessing.Event(), multiprocessing.Event()]
+        self.free = [multiprocessing.Event(), multiprocessing.Event()]
+        for event in self.free:
+            event.set()
+        self.stop = multiprocessing.Event()
+        self.index = 0
+        
+        self.process = multiprocessing.Process(
+            target=produce_noise,
+            args=(self.shm.name, shape, self.ready, self.free, self.stop),
+            daemon=True
+        )
+        self.process.start()
+
+    def next_mask(self):
+        """Wait for the next finished noise mask and return its buffer"""
+        while not self.ready[self.index].wait(0.1):
+            if not self.process.is_alive():
+                raise RuntimeError("Noise producer process exited")
+        return self.buffers[self.index]
+
+    def release_mask(self):
+        """Hand the current buffer back to the worker to draw into"""
+        self.ready[self.index].clear()
+        self.free[self.index].set()
+        self.index ^= 1
+
+    def close(self):
+        self.stop.set()
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        del self.buffers
+        self.shm.close()
+        self.shm.unlink()
+
 
 # -----------------------------------------------------------------------------
 # Display class: Handles window creation, rendering, texture updates, and frame
@@ -45,19 +121,44 @@ class Display:
         if not self.texture:
             raise RuntimeError(f"SDL_CreateTexture Error: {sdl2.SDL_GetError().decode()}")
 
-        # Create pixel buffer
-        self.pixels = (ctypes.c_uint32 * (self.WIDTH * self.HEIGHT))()
-        
-        # Initialize random number generator
-        random.seed()
-        
         # Base title for window
         self.base_title = title
         
-        # Random noise array
-        self.noise_array = np.random.randint(0, 0xFFFFFFFF, (self.HEIGHT, self.WIDTH), dtype=np.uint32)
+        # 7 color bars (ARGB): white, yellow, cyan, green, magenta, red, blue.
+        color_bars = np.array([
+            0xFFFFFFFF,  # White
+            0xFFFFFF00,  # Yellow
+            0xFF00FFFF,  # Cyan
+            0xFF00FF00,  # Green
+            0xFFFF00FF,  # Magenta
+            0xFFFF0000,  # Red
+            0xFF0000FF   # Blue
+        ], dtype=np.uint32)
+
+        # The bars and the scanline dimming never change, so shade the whole
+        # frame once here; each frame then only has to apply fresh noise.
+        bar_row = color_bars[(np.arange(self.WIDTH) * 7) // self.WIDTH]
+        brightness = np.where(np.arange(self.HEIGHT) % 2 == 0, 0.75, 1.0)[:, None]
+        a = (bar_row >> 24) & 0xFF
+        r = (((bar_row >> 16) & 0xFF) * brightness).astype(np.uint32)
+        g = (((bar_row >> 8) & 0xFF) * brightness).astype(np.uint32)
+        b = ((bar_row & 0xFF) * brightness).astype(np.uint32)
+        self.frame_template = (a << 24) | (r << 16) | (g << 8) | b
+        
+        # Lock out-parameters and references to them, reused every frame
+        self.texture_ptr = ctypes.c_void_p()
+        self.texture_pitch = ctypes.c_int()
+        self.texture_ptr_ref = ctypes.byref(self.texture_ptr)
+        self.texture_pitch_ref = ctypes.byref(self.texture_pitch)
+        self.pixels = None
+        self.pixels_addr = None
+        
+        # Noise is generated in a separate process
+        self.producer = NoiseProducer((self.HEIGHT, self.WIDTH))
 
     def __del__(self):
+        if hasattr(self, 'producer'):
+            self.producer.close()
         if hasattr(self, 'texture') and self.texture:
             sdl2.SDL_DestroyTexture(self.texture)
         if hasattr(self, 'renderer') and self.renderer:
@@ -66,19 +167,30 @@ class Display:
             sdl2.SDL_DestroyWindow(self.window)
 
     # Updates the frame: regenerates the display with color bars, scanlines,
-    # and noise.
+    # and noise, drawing straight into the locked texture.
     def update(self):
-        # Update the noise array with fresh random values
-        self.noise_array = np.random.randint(0, 0xFFFFFFFF, (self.HEIGHT, self.WIDTH), dtype=np.uint32)
+        noise_mask = self.producer.next_mask()
+        
+        try:
+            if sdl2.SDL_LockTexture(self.texture, None, self.texture_ptr_ref, self.texture_pitch_ref) != 0:
+                raise RuntimeError(f"SDL_LockTexture Error: {sdl2.SDL_GetError().decode()}")
+            
+            # The driver usually hands back the same buffer every frame, so
+            # only build a new array view over it when it moves
+            if self.texture_ptr.value != self.pixels_addr:
+                pixels = np.ctypeslib.as_array(
+                    ctypes.cast(self.texture_ptr, ctypes.POINTER(ctypes.c_uint32)),
+                    shape=(self.HEIGHT, self.texture_pitch.value // ctypes.sizeof(ctypes.c_uint32))
+                )
+                self.pixels = pixels[:, :self.WIDTH]
+                self.pixels_addr = self.texture_ptr.value
+            self.generate_frame(noise_mask, self.pixels)
+            sdl2.SDL_UnlockTexture(self.texture)
+        finally:
+            # The mask has been used up (or the frame abandoned), so the
+            # buffer can be redrawn
+            self.producer.release_mask()
         
-        self.generate_frame()
-        sdl2.SDL_UpdateTexture(
-            self.texture,
-            None,
-            ctypes.byref(self.pixels),
-            self.WIDTH * ctypes.sizeof(ctypes.c_uint32)
-        )
-        sdl2.SDL_RenderClear(self.renderer)
         sdl2.SDL_RenderCopy(self.renderer, self.texture, None, None)
         sdl2.SDL_RenderPresent(self.renderer)
         
@@ -88,48 +200,10 @@ class Display:
         sdl2.SDL_SetWindowTitle(self.window, title.encode())
 
     # Generates a frame with classic color bars, a scanline effect, and some
-    # noise.
-    def generate_frame(self):
-        # Convert to NumPy array for Numba
-        pixels_array = np.frombuffer(self.pixels, dtype=np.uint32).reshape(self.HEIGHT, self.WIDTH)
-        
-        # 7 color bars (ARGB): white, yellow, cyan, green, magenta, red, blue.
-        color_bars = np.array([
-            0xFFFFFFFF,  # White
-            0xFFFFFF00,  # Yellow
-            0xFF00FFFF,  # Cyan
-            0xFF00FF00,  # Green
-            0xFFFF00FF,  # Magenta
-            0xFFFF0000,  # Red
-            0xFF0000FF   # Blue
-        ], dtype=np.uint32)
-        
-        # Call JIT-optimized function
-        _generate_frame_jit(pixels_array, self.WIDTH, self.HEIGHT, color_bars, self.noise_array)
-
-# JIT-optimized function for pixel manipulation
-@jit(nopython=True)
-def _generate_frame_jit(pixels, width, height, color_bars, noise_array):
-    for y in range(height):
-        brightness = 0.75 if y % 2 == 0 else 1.0  # Scanline dimming
-        for x in range(width):
-            bar_index = (x * 7) // width
-            base_color = color_bars[bar_index]
-
-            # Extract ARGB components and apply brightness
-            a = (base_color >> 24) & 0xFF
-            r = int(((base_color >> 16) & 0xFF) * brightness)
-            g = int(((base_color >> 8) & 0xFF) * brightness)
-            b = int((base_color & 0xFF) * brightness)
-            color = (a << 24) | (r << 16) | (g << 8) | b
-
-            # Use pre-generated noise from the noise array
-            # Generate a mask to add noise. 1s in the high bits (and
-            # the alpha channel), random noise in the low order bits.
-            noise = noise_array[y, x] | 0xFFC0C0C0
-            color &= noise
-
-            pixels[y, x] = color
+    # noise. The bars and scanlines come ready shaded in the frame template.
+    def generate_frame(self, noise_mask, out):
+        np.bitwise_and(self.frame_template, noise_mask, out=out)
+
 
 
 # -----------------------------------------------------------------------------
@@ -142,10 +216,14 @@ class System:
         self.fps = 0.0
         self.last_time = time.time()
         self.fps_update_interval = 0.5  # Update FPS display every 0.5 seconds
+        
+        # One event and reference to it, reused for every poll
+        self.event = sdl2.SDL_Event()
+        self.event_ref = ctypes.byref(self.event)
 
     def run(self):
         quit = False
-        event = sdl2.SDL_Event()
+        event = self.event
         
         while not quit:
             # FPS calculation
@@ -160,7 +238,7 @@ class System:
                 self.frame_count = 0
                 self.last_time = current_time
             
-            while sdl2.SDL_PollEvent(ctypes.byref(event)) != 0:
+            while sdl2.SDL_PollEvent(self.event_ref) != 0:
                 if event.type == sdl2.SDL_QUIT or event.type == sdl2.SDL_KEYDOWN:
                     quit = True
             
@@ -2,10 +2,11 @@
 import sys
 import ctypes
 import time
+import struct
 import numpy as np
 import sdl2
 import sdl2.ext
-from numba import jit, uint32
+from numba import njit, prange
 import os
 
 # Add the vendored pyz80 directory to the path
@@ -15,8 +16,12 @@ if pyz80_dir not in sys.path:
     sys.path.insert(0, pyz80_dir)
 
 # Import Z80 CPU
-from pyz80 import Z80
-from _z80_bindings import Z80_INT, Z80_M1, Z80_MREQ, Z80_IORQ, Z80_RD, Z80_WR, Z80_SET_DATA, Z80_PIN_D0
+from pyz80 import Z80, z80_lib
+from _z80_bindings import Z80_INT, Z80_M1, Z80_MREQ, Z80_IORQ, Z80_RD, Z80_WR, Z80_PIN_D0
+
+# Address and data bus bits of the pin state
+Z80_ADDR_MASK = 0xFFFF
+Z80_DATA_MASK = 0xFF << Z80_PIN_D0
 
 # -----------------------------------------------------------------------------
 # Timing constants (all in T-states)
@@ -36,7 +41,7 @@ class CRT:
     VISIBLE_LINES = FIELD_LINES - TOP_BLANKING - BOTTOM_BLANKING
     CRT_LINES = VISIBLE_LINES * 2  # For interlacing
 
-    def __init__(self, title="PYSE - Python Spectrum Emulator"):
+    def __init__(self, title="PYSE - Python Spectrum Emulator", phosphor=False):
         # Initialize SDL window and renderer with 2x scaling for better visibility
         self.window = sdl2.SDL_CreateWindow(
             title.encode(),
@@ -52,26 +57,53 @@ class CRT:
         self.renderer = sdl2.SDL_CreateRenderer(
             self.window, 
             -1, 
-            sdl2.SDL_RENDERER_ACCELERATED
+            sdl2.SDL_RENDERER_ACCELERATED | sdl2.SDL_RENDERER_PRESENTVSYNC
         )
         if not self.renderer:
             raise RuntimeError(f"SDL_CreateRenderer Error: {sdl2.SDL_GetError().decode()}")
 
-        # Set 2x horizontal scaling
-        sdl2.SDL_RenderSetScale(self.renderer, 2.0, 1.0)
+        # The phosphor display interlaces the fields into CRT_LINES rows, with
+        # fade and bleed between them. Otherwise each scanline is drawn once
+        # and SDL doubles it vertically.
+        self.phosphor = phosphor
+        self.buffer_lines = self.CRT_LINES if phosphor else self.VISIBLE_LINES
+
+        # Set 2x horizontal scaling (and 2x vertical without interlacing)
+        sdl2.SDL_RenderSetScale(self.renderer, 2.0, 1.0 if phosphor else 2.0)
+
+        # Without the phosphor fade every pixel is one of the palette's
+        # full-on/off colours, which RGB565 holds exactly in half the bytes
+        if phosphor:
+            self.pixel_format = sdl2.SDL_PIXELFORMAT_RGBA8888
+            frame_dtype = np.uint32
+        else:
+            self.pixel_format = sdl2.SDL_PIXELFORMAT_RGB565
+            frame_dtype = np.uint16
 
         self.texture = sdl2.SDL_CreateTexture(
             self.renderer,
-            sdl2.SDL_PIXELFORMAT_RGBA8888,
+            self.pixel_format,
             sdl2.SDL_TEXTUREACCESS_STREAMING,
             self.TOTAL_WIDTH,
-            self.CRT_LINES
+            self.buffer_lines
         )
         if not self.texture:
             raise RuntimeError(f"SDL_CreateTexture Error: {sdl2.SDL_GetError().decode()}")
 
-        # Create pixel buffer
-        self.pixels = np.zeros((self.CRT_LINES, self.TOTAL_WIDTH), dtype=np.uint32)
+        # Create pixel buffers: the phosphor is kept as separate R, G and B
+        # planes so the fade and bleed work on plain bytes, and is packed
+        # into texture pixels only when a frame is uploaded
+        self.planes = np.zeros((3, self.buffer_lines, self.TOTAL_WIDTH), dtype=np.uint8)
+        # The planes again as 64-bit words, 8 pixels (one column) per word
+        self.plane_words = self.planes.view(np.uint64)
+        self.frame_out = np.zeros((self.buffer_lines, self.TOTAL_WIDTH), dtype=frame_dtype)
+        self.frame_out_addr = self.frame_out.ctypes.data
+        
+        # Locked texture pointer and pitch, filled in by SDL on every refresh
+        self.texture_ptr = ctypes.c_void_p()
+        self.texture_pitch = ctypes.c_int()
+        self.texture_ptr_ref = ctypes.byref(self.texture_ptr)
+        self.texture_pitch_ref = ctypes.byref(self.texture_pitch)
         
         # Base title for window
         self.base_title = title
@@ -91,6 +123,19 @@ class CRT:
             0xFFFF00FF,  # Yellow
             0xFFFFFFFF   # White
         ], dtype=np.uint32)
+        
+        # The same palette split into R, G, B channels for the planes
+        self.rgb_color_table = np.stack([
+            (self.rgba_color_table >> 24) & 0xFF,
+            (self.rgba_color_table >> 16) & 0xFF,
+            (self.rgba_color_table >> 8) & 0xFF
+        ], axis=1).astype(np.uint8)
+        
+        # For every display byte, a 0xFF/0x00 byte per pixel (MSB is leftmost)
+        # marking which of its 8 pixels show ink, read back as one 64-bit word
+        # laid out like 8 pixels of a plane
+        bits = (np.arange(256)[:, None] >> np.arange(7, -1, -1)[None, :]) & 1
+        self.pixel_mask_lut = (bits * 0xFF).astype(np.uint8).view(np.uint64).reshape(256)
 
     def __del__(self):
         if hasattr(self, 'texture') and self.texture:
@@ -100,18 +145,37 @@ class CRT:
         if hasattr(self, 'window') and self.window:
             sdl2.SDL_DestroyWindow(self.window)
 
+    def pack_pixels(self):
+        """Pack the R, G, B planes into the texture-format output buffer"""
+        if self.phosphor:
+            pack_planes_jit(self.planes, self.frame_out)
+        else:
+            pack_planes_rgb565_jit(self.planes, self.frame_out)
+        return self.frame_out
+
     def refresh(self):
         """Update the screen with current pixel data"""
-        # Convert numpy array to ctypes array for SDL
-        pixels_ptr = self.pixels.ctypes.data_as(ctypes.POINTER(ctypes.c_uint32))
-        
-        sdl2.SDL_UpdateTexture(
-            self.texture,
-            None,
-            pixels_ptr,
-            self.TOTAL_WIDTH * ctypes.sizeof(ctypes.c_uint32)
-        )
-        sdl2.SDL_RenderClear(self.renderer)
+        pixels = self.pack_pixels()
+        
+        # Lock the streaming texture and copy the frame straight into its
+        # pixel memory. Our own buffer stays the source of truth, since the
+        # phosphor fade reads the previous frame and locked texture memory
+        # is write-only.
+        if sdl2.SDL_LockTexture(self.texture, None, self.texture_ptr_ref, self.texture_pitch_ref) != 0:
+            raise RuntimeError(f"SDL_LockTexture Error: {sdl2.SDL_GetError().decode()}")
+        
+        pitch = self.texture_pitch.value
+        if pitch == pixels.strides[0]:
+            ctypes.memmove(self.texture_ptr, self.frame_out_addr, pixels.nbytes)
+        else:
+            texture_pixels = np.ctypeslib.as_array(
+                ctypes.cast(self.texture_ptr, ctypes.POINTER(np.ctypeslib.as_ctypes_type(pixels.dtype))),
+                shape=(self.buffer_lines, pitch // pixels.itemsize)
+            )
+            texture_pixels[:, :self.TOTAL_WIDTH] = pixels
+        sdl2.SDL_UnlockTexture(self.texture)
+        
+        # The texture covers the whole window, so there is nothing to clear
         sdl2.SDL_RenderCopy(self.renderer, self.texture, None, None)
         sdl2.SDL_RenderPresent(self.renderer)
 
@@ -129,13 +193,110 @@ class CRT:
         self.odd_field = not self.odd_field
 
 
+# JIT-compiled packer from R, G, B planes to RGBA8888 pixels
+@njit(cache=True)
+def pack_planes_jit(planes, rgba_out):
+    """Combine the colour planes into one RGBA pixel per location"""
+    for y in range(rgba_out.shape[0]):
+        for x in range(rgba_out.shape[1]):
+            rgba_out[y, x] = ((np.uint32(planes[0, y, x]) << 24) |
+                              (np.uint32(planes[1, y, x]) << 16) |
+                              (np.uint32(planes[2, y, x]) << 8) |
+                              np.uint32(0xFF))
+
+
+# JIT-compiled packer from R, G, B planes to RGB565 pixels
+@njit(cache=True)
+def pack_planes_rgb565_jit(planes, rgb565_out):
+    """Combine the top 5, 6 and 5 bits of the colour planes into one pixel"""
+    for y in range(rgb565_out.shape[0]):
+        for x in range(rgb565_out.shape[1]):
+            rgb565_out[y, x] = (((np.uint16(planes[0, y, x]) >> 3) << 11) |
+                                ((np.uint16(planes[1, y, x]) >> 2) << 5) |
+                                (np.uint16(planes[2, y, x]) >> 3))
+
+
+# One byte per pixel lane of a 64-bit word, and the fade mask that keeps a
+# shift from carrying one pixel into its neighbour
+BYTE_LANES = np.uint64(0x0101010101010101)
+FADE_MASK = np.uint64(0x3F3F3F3F3F3F3F3F)
+
+
+# JIT-compiled pixel painter for one 8-pixel column of a scanline
+@njit(cache=True)
+def update_pixels_jit(
+    plane_words, line, column, display_byte, attr_byte,
+    top_blanking, odd_field, flash_inverted, rgb_color_table, pixel_mask_lut, phosphor
+):
+    """Paint one display byte (8 pixels), plus its bleed line on a phosphor display"""
+    # Adjust for top blanking
+    adjusted_line = line - top_blanking
+    
+    # Interlace fields (odd/even lines)
+    offset_y = adjusted_line * 2 + (1 if odd_field else 0)
+    
+    # Calculate bleed line (for phosphor effect). The odd field bleeds up
+    # and the even field down, so it always stays inside the CRT lines
+    bleed_y = offset_y + (-1 if odd_field else 1)
+    
+    if not phosphor:
+        # One row per scanline, no interlacing
+        offset_y = adjusted_line
+    
+    # Parse attribute byte
+    flash = (attr_byte & 0x80) != 0
+    bright = (attr_byte & 0x40) != 0
+    paper = (attr_byte >> 3) & 0x07
+    ink = attr_byte & 0x07
+    
+    # Which of the 8 pixels (one per byte of the word) show ink. Swapping
+    # ink and paper for the flash attribute is the same as inverting it.
+    ink_mask = pixel_mask_lut[display_byte]
+    if flash and flash_inverted:
+        ink_mask = ~ink_mask
+    
+    for channel in range(3):
+        row = plane_words[channel, offset_y]
+        
+        # Get colors from palette
+        paper_color = rgb_color_table[paper, channel]
+        ink_color = rgb_color_table[ink, channel]
+        
+        # Spread each color over all 8 pixels and pick ink or paper per pixel
+        color = ((np.uint64(ink_color) * BYTE_LANES) & ink_mask) | \
+                ((np.uint64(paper_color) * BYTE_LANES) & ~ink_mask)
+        
+        if not phosphor:
+            row[column] = color
+            continue
+        
+        bleed_row = plane_words[channel, bleed_y]
+        
+        # Precompute pixel bleed colors
+        if not bright:
+            # 50% brightness for non-bright colors
+            bleed_paper = np.uint8(paper_color >> 1)
+            bleed_ink = np.uint8(ink_color >> 1)
+        else:
+            # 84% brightness for bright colors (mimics phosphor persistence)
+            bleed_paper = np.uint8(((paper_color >> 3) & 0x07) * 27)
+            bleed_ink = np.uint8(((ink_color >> 3) & 0x07) * 27)
+        
+        bleed_color = ((np.uint64(bleed_ink) * BYTE_LANES) & ink_mask) | \
+                      ((np.uint64(bleed_paper) * BYTE_LANES) & ~ink_mask)
+        
+        # Apply fading to existing pixels and add new color
+        row[column] = ((row[column] >> np.uint64(2)) & FADE_MASK) | color
+        bleed_row[column] = ((bleed_row[column] >> np.uint64(2)) & FADE_MASK) | bleed_color
+
+
 # JIT-compiled single-pass screen update function
-@jit(nopython=True, cache=True)
+@njit(cache=True)
 def screen_update_full_jit(
-    pixels, ram, line, column, border_color,
-    top_blanking, visible_lines, total_width, crt_lines,
+    plane_words, ram, display_addr_lut, attr_addr_lut, line, column, border_color,
+    top_blanking, visible_lines, total_width,
     screen_start_line, screen_height, screen_start_column, screen_width_bytes,
-    odd_field, flash_inverted, rgba_color_table
+    odd_field, flash_inverted, rgb_color_table, pixel_mask_lut, phosphor
 ):
     """Handle the entire screen update process in a single JIT-compiled function"""
     # Skip if in blanking interval
@@ -155,16 +316,9 @@ def screen_update_full_jit(
         screen_line = line - screen_start_line
         screen_col = column - screen_start_column
         
-        # Calculate memory addresses for display and attribute data
-        # Display address calculation
-        display_addr = 0x4000
-        display_addr |= ((screen_line & 0xC0) << 5)  # Which third of the screen (0-2)
-        display_addr |= ((screen_line & 0x07) << 8)  # Which character cell row (0-7)
-        display_addr |= ((screen_line & 0x38) << 2)  # Remaining bits (which row of character cells)
-        display_addr |= screen_col & 0b00011111      # 5 bits of X (0-31)
-        
-        # Attribute address calculation
-        attr_addr = 0x5800 + ((screen_line >> 3) * 32) + screen_col
+        # Look up memory addresses for display and attribute data
+        display_addr = display_addr_lut[screen_line, screen_col]
+        attr_addr = attr_addr_lut[screen_line, screen_col]
         
         # Read display and attribute bytes from memory
         display_byte = ram[display_addr]
@@ -174,113 +328,240 @@ def screen_update_full_jit(
         display_byte = 0x00
         attr_byte = (border_color << 3)  # Border color as paper
     
-    # Now render the pixels
-    # Adjust for top blanking
+    update_pixels_jit(
+        plane_words, line, column, display_byte, attr_byte,
+        top_blanking, odd_field, flash_inverted, rgb_color_table, pixel_mask_lut, phosphor
+    )
+
+
+# JIT-compiled border painter for a run of columns on one scanline
+@njit(cache=True)
+def border_fill_jit(
+    plane_words, line, start_column, end_column, border_color,
+    top_blanking, odd_field, rgb_color_table, phosphor
+):
+    """Paint columns start_column to end_column of a scanline in the border color
+
+    The border is plain paper with no BRIGHT, so every column gets the same
+    word and the colors only need working out once for the whole run.
+    """
     adjusted_line = line - top_blanking
-    
-    # Interlace fields (odd/even lines)
     offset_y = adjusted_line * 2 + (1 if odd_field else 0)
-    
-    # Calculate pixel offset
-    offset_x = column * 8
-    
-    # Calculate bleed line (for phosphor effect)
     bleed_y = offset_y + (-1 if odd_field else 1)
-    bleed_y = max(0, min(bleed_y, crt_lines - 1))  # Clamp to valid range
+    if not phosphor:
+        offset_y = adjusted_line
     
-    # Parse attribute byte
-    flash = (attr_byte & 0x80) != 0
-    bright = (attr_byte & 0x40) != 0
-    paper = (attr_byte >> 3) & 0x07
-    ink = attr_byte & 0x07
-    
-    # Handle flash attribute
-    if flash and flash_inverted:
-        temp = paper
-        paper = ink
-        ink = temp
-        
-    # Get colors from palette
-    paper_color = rgba_color_table[paper]
-    ink_color = rgba_color_table[ink]
-    
-    # Precompute pixel bleed colors
-    if not bright:
-        # 50% brightness for non-bright colors
-        bleed_paper = ((paper_color >> 1) & 0x7F7F7F7F) | 0x000000FF
-        bleed_ink = ((ink_color >> 1) & 0x7F7F7F7F) | 0x000000FF
-    else:
-        # 84% brightness for bright colors (mimics phosphor persistence)
-        bleed_paper = (((paper_color >> 3) & 0x07070707) * 27) | 0x000000FF
-        bleed_ink = (((ink_color >> 3) & 0x07070707) * 27) | 0x000000FF
-    
-    # Update 8 pixels (MSB is leftmost)
-    for bit in range(7, -1, -1):
-        pixel_set = (display_byte & (1 << bit)) != 0
-        pixel_x = offset_x + (7 - bit)
-        
-        # Apply pixel to main scanline and adjacent scanline
-        if pixel_set:
-            color = ink_color
-            bleed_color = bleed_ink
+    for channel in range(3):
+        row = plane_words[channel, offset_y]
+        paper_color = rgb_color_table[border_color, channel]
+        color = np.uint64(paper_color) * BYTE_LANES
+        
+        if not phosphor:
+            row[start_column:end_column] = color
+            continue
+        
+        bleed_row = plane_words[channel, bleed_y]
+        bleed_color = np.uint64(np.uint8(paper_color >> 1)) * BYTE_LANES
+        for column in range(start_column, end_column):
+            row[column] = ((row[column] >> np.uint64(2)) & FADE_MASK) | color
+            bleed_row[column] = ((bleed_row[column] >> np.uint64(2)) & FADE_MASK) | bleed_color
+
+
+# JIT-compiled whole-field renderer, used when the beam isn't being raced
+@njit(parallel=True, cache=True)
+def render_field_jit(
+    plane_words, ram, display_addr_lut, attr_addr_lut, border_lines,
+    top_blanking, visible_lines, total_width,
+    screen_start_line, screen_height, screen_start_column, screen_width_bytes,
+    odd_field, flash_inverted, rgb_color_table, pixel_mask_lut, phosphor
+):
+    """Draw every visible scanline of a field from the current screen memory
+
+    Each scanline only touches its own row (or pair of interlaced CRT lines
+    on a phosphor display), so the scanlines can be rendered in parallel.
+    """
+    columns = total_width // 8
+    screen_end_column = screen_start_column + screen_width_bytes
+    for line in prange(top_blanking, top_blanking + visible_lines):
+        border_color = border_lines[line]
+        if line < screen_start_line or line >= screen_start_line + screen_height:
+            # All border: the top and bottom margins
+            border_fill_jit(
+                plane_words, line, 0, columns, border_color,
+                top_blanking, odd_field, rgb_color_table, phosphor
+            )
+            continue
+        
+        border_fill_jit(
+            plane_words, line, 0, screen_start_column, border_color,
+            top_blanking, odd_field, rgb_color_table, phosphor
+        )
+        for column in range(screen_start_column, screen_end_column):
+            screen_update_full_jit(
+                plane_words, ram, display_addr_lut, attr_addr_lut, line, column, border_color,
+                top_blanking, visible_lines, total_width,
+                screen_start_line, screen_height, screen_start_column, screen_width_bytes,
+                odd_field, flash_inverted, rgb_color_table, pixel_mask_lut, phosphor
+            )
+        border_fill_jit(
+            plane_words, line, screen_end_column, columns, border_color,
+            top_blanking, odd_field, rgb_color_table, phosphor
+        )
+
+
+# Slots of the ULA state array, shared by the ULA and the compiled runner
+ULA_LINE = 0            # Current scanline (0-311)
+ULA_LINE_CYCLE = 1      # Current cycle within line (0-223)
+ULA_FLASH_FLIPPER = 2   # Fields left until the FLASH attribute toggles
+ULA_BORDER_COLOR = 3    # Current border color (0-7)
+ULA_IO_PENDING = 4      # A T-state is waiting on Python for its IO transaction
+ULA_STATE_SIZE = ULA_IO_PENDING + 1
+
+# Reasons the compiled runner hands control back to Python
+RUN_DONE = 0            # Ran all the T-states asked for
+RUN_IO = 1              # The CPU wants an IO read or write
+RUN_FIELD_END = 2       # The beam has just finished a field
+
+
+# JIT-compiled bus loop: clocks the CPU and ULA together
+@njit(cache=True)
+def ula_run_jit(
+    z80_tick, cpu_state, pins, t_states, state, ram, border_lines, race_beam,
+    plane_words, display_addr_lut, attr_addr_lut,
+    top_blanking, visible_lines, total_width,
+    screen_start_line, screen_height, screen_start_column, screen_width_bytes,
+    odd_field, flash_inverted, rgb_color_table, pixel_mask_lut, phosphor,
+    t_states_per_line, field_lines, border_t_states, interrupt_duration
+):
+    """Run up to t_states T-states of CPU, memory and beam activity
+
+    Memory requests are served straight from ram. IO requests and the end of
+    each field need Python, so the loop returns early for them; the caller
+    deals with the event and calls again. Returns the new pins, the number
+    of T-states completed and why the loop returned.
+    """
+    data_shift = np.uint64(Z80_PIN_D0)
+    data_mask = np.uint64(0xFF) << data_shift
+    paint_cycles = (total_width // 8) * 4
+    line = state[ULA_LINE]
+    line_cycle = state[ULA_LINE_CYCLE]
+    # Whether the beam paints on this line; only changes when the line does
+    beam_line = race_beam and line >= top_blanking and line < top_blanking + visible_lines
+    done = 0
+    while True:
+        if state[ULA_IO_PENDING]:
+            # Python has just done the IO for this T-state; finish it off
+            state[ULA_IO_PENDING] = 0
         else:
-            color = paper_color
-            bleed_color = bleed_paper
+            if done >= t_states:
+                return pins, done, RUN_DONE
+            
+            # First tick the CPU
+            pins = z80_tick(cpu_state, pins)
             
-        # Apply fading to existing pixel and add new color
-        pixels[offset_y, pixel_x] = ((pixels[offset_y, pixel_x] >> 2) & 0x3F3F3F3F) | color
-        pixels[bleed_y, pixel_x] = ((pixels[bleed_y, pixel_x] >> 2) & 0x3F3F3F3F) | bleed_color
+            # The beam paints one 8-pixel column every 4 T-states
+            if beam_line and line_cycle < paint_cycles and (line_cycle & 3) == 0:
+                column = line_cycle >> 2
+                screen_update_full_jit(
+                    plane_words, ram, display_addr_lut, attr_addr_lut,
+                    line, column, state[ULA_BORDER_COLOR],
+                    top_blanking, visible_lines, total_width,
+                    screen_start_line, screen_height, screen_start_column, screen_width_bytes,
+                    odd_field, flash_inverted, rgb_color_table, pixel_mask_lut, phosphor
+                )
+            
+            # Process memory transactions; IO goes back to Python
+            if pins & Z80_MREQ:
+                addr = pins & np.uint64(0xFFFF)
+                if pins & Z80_RD:
+                    pins = (pins & ~data_mask) | (np.uint64(ram[addr]) << data_shift)
+                elif pins & Z80_WR:
+                    ram[addr] = (pins & data_mask) >> data_shift
+            elif pins & Z80_IORQ:
+                if pins & Z80_M1:  # Interrupt acknowledge
+                    pins = pins | data_mask
+                elif pins & (Z80_RD | Z80_WR):
+                    state[ULA_IO_PENDING] = 1
+                    return pins, done, RUN_IO
+        
+        done += 1
+        
+        # Update position counters
+        line_cycle += 1
+        
+        # Generate interrupts at the start of the frame
+        if line == 0 and line_cycle == border_t_states:
+            pins = pins | np.uint64(Z80_INT)
+        elif line == 0 and line_cycle == border_t_states + interrupt_duration:
+            pins = pins & ~np.uint64(Z80_INT)
+        
+        # Check if we've reached the end of a line
+        if line_cycle >= t_states_per_line:
+            line_cycle = 0
+            line += 1
+            field_end = line >= field_lines
+            if field_end:
+                line = 0
+            state[ULA_LINE] = line
+            state[ULA_LINE_CYCLE] = line_cycle
+            border_lines[line] = state[ULA_BORDER_COLOR]
+            beam_line = race_beam and line >= top_blanking and line < top_blanking + visible_lines
+            if field_end:
+                return pins, done, RUN_FIELD_END
+        else:
+            state[ULA_LINE_CYCLE] = line_cycle
 
 
 # -----------------------------------------------------------------------------
-# Memory class: Implements a 64K memory space with ROM protection
+# Memory class: Implements a flat 64K memory space; writes to ROM are not blocked
 class Memory:
     def __init__(self):
         # Create 64K of RAM initialized to 0
         self.ram = np.zeros(0x10000, dtype=np.uint8)
         
         # Initialize screen memory with a recognizable pattern
-        for y in range(192):
-            for x in range(32):
-                addr = 0x4000 + (y * 32) + x
-                # Create diagonal stripes (similar to omse-mini)
-                self.ram[addr] = 0xAA if ((x + (y // 8)) & 0x07) else 0x55
+        y = np.arange(192)[:, None]
+        x = np.arange(32)[None, :]
+        # Create diagonal stripes (similar to omse-mini)
+        self.ram[0x4000:0x5800] = np.where((x + (y // 8)) & 0x07, 0xAA, 0x55).ravel()
                 
         # Set attributes to alternate colors
-        for y in range(24):
-            for x in range(32):
-                attr_addr = 0x5800 + (y * 32) + x
-                # Alternate between cyan on black and yellow on blue
-                self.ram[attr_addr] = 0x45 if ((x + y) & 1) else 0x16
+        y = np.arange(24)[:, None]
+        # Alternate between cyan on black and yellow on blue
+        self.ram[0x5800:0x5B00] = np.where((x + y) & 1, 0x45, 0x16).ravel()
+        
+        # Screen address lookup tables, indexed by (screen line, column).
+        # Display bytes are interleaved by character row and screen third.
+        screen_line = np.arange(192)[:, None]
+        screen_col = np.arange(32)[None, :]
+        self.display_addr_lut = (
+            0x4000
+            | ((screen_line & 0xC0) << 5)  # Which third of the screen (0-2)
+            | ((screen_line & 0x07) << 8)  # Which character cell row (0-7)
+            | ((screen_line & 0x38) << 2)  # Remaining bits (which row of character cells)
+            | screen_col                   # 5 bits of X (0-31)
+        ).astype(np.uint16)
+        self.attr_addr_lut = (0x5800 + (screen_line >> 3) * 32 + screen_col).astype(np.uint16)
     
     def read(self, address):
         """Read a byte from memory at the specified address"""
         return self.ram[address]
     
     def write(self, address, value):
-        """Write a byte to memory, with ROM protection"""
-        if address < 0x4000:
-            # return  # Ignore writes to ROM
-            # TODO: See if we should reenable this memory protection
-            pass  # Ignore writes to ROM
-                
+        """Write a byte to memory"""
+        # TODO: See if we should reenable ROM protection (ignore writes
+        # below 0x4000); the compiled bus loop doesn't protect ROM either
         self.ram[address] = value
     
     def load_from_file(self, filename, addr, size):
         """Load binary data from a file into memory"""
         with open(filename, 'rb') as f:
-            # Get file size
-            f.seek(0, 2)  # Seek to end
-            file_size = f.tell()
-            f.seek(0)     # Seek back to beginning
-            
             # Check if we have enough data
-            if file_size < size:
+            if os.fstat(f.fileno()).st_size < size:
                 raise RuntimeError(f"File too small: need at least {size} bytes")
             
-            # Read data into memory
-            data = f.read(size)
-            self.ram[addr:addr+size] = np.frombuffer(data, dtype=np.uint8)
+            # Read data straight into memory
+            f.readinto(memoryview(self.ram)[addr:addr+size])
 
 
 # -----------------------------------------------------------------------------
@@ -299,31 +580,54 @@ class IODevice:
 # IODeviceBus: Manages IO devices with port masking
 class IODeviceBus:
     def __init__(self):
-        # List of (mask, device) pairs
-        self.devices = []
+        # Read and write handlers for each low byte of the port address.
+        # Ports no device responds to fall through to a plain IODevice.
+        unmapped = IODevice()
+        self.read_table = [unmapped.read] * 256
+        self.write_table = [unmapped.write] * 256
+        self.mapped = [False] * 256
+        
+        # Devices whose masks reach into the high address byte, per low byte,
+        # that were added before any low-byte device claimed it. These need
+        # the full address test, so they are checked ahead of the table.
+        self.wide_devices = [[] for _ in range(256)]
     
     def add_device(self, mask, device):
         """Add a device with the specified port mask
         
+        Masks within the low address byte are decoded through a table;
+        wider masks (e.g. 0x8002 for 128K paging) are tested on the full
+        address. The first device added wins where masks overlap.
+        
         Args:
             mask: port mask (devices respond when ~addr & mask == mask)
             device: IODevice instance
         """
-        self.devices.append((mask, device))
+        low_mask = mask & 0xFF
+        for low in range(256):
+            if ((~low) & low_mask) != low_mask or self.mapped[low]:
+                continue
+            if mask & ~0xFF:
+                self.wide_devices[low].append((mask, device))
+            else:
+                self.read_table[low] = device.read
+                self.write_table[low] = device.write
+                self.mapped[low] = True
     
     def read(self, addr):
         """Read from the appropriate device based on port address"""
-        for mask, device in self.devices:
+        for mask, device in self.wide_devices[addr & 0xFF]:
             if ((~addr) & mask) == mask:
                 return device.read(addr)
-        return 0xFF  # Default return value if no device responds
+        return self.read_table[addr & 0xFF](addr)
     
     def write(self, addr, value):
         """Write to the appropriate device based on port address"""
-        for mask, device in self.devices:
+        for mask, device in self.wide_devices[addr & 0xFF]:
             if ((~addr) & mask) == mask:
                 device.write(addr, value)
                 return
+        self.write_table[addr & 0xFF](addr, value)
 
 
 # -----------------------------------------------------------------------------
@@ -335,6 +639,13 @@ class CPU:
         self.z80 = Z80()
         self.pins = self.z80.pins
         
+        # Raw tick entry point and state address, so compiled code can clock
+        # the CPU without going through the wrapper
+        self.z80_tick = ctypes.CFUNCTYPE(ctypes.c_uint64, ctypes.c_size_t, ctypes.c_uint64)(
+            ctypes.cast(z80_lib.z80_tick, ctypes.c_void_p).value
+        )
+        self.state_addr = ctypes.addressof(self.z80._cpu_state_buffer)
+        
     def get_state_summary(self):
         """Get a clean summary of the CPU state"""
         return str(self.z80)
@@ -345,29 +656,27 @@ class CPU:
         
     def transact(self):
         """Handle memory and IO transactions based on pin state"""
-        if (self.pins & Z80_MREQ):  # Memory request
-            addr = self.z80.addr
-            if (self.pins & Z80_RD):  # Memory read
-                data = self.memory.read(addr)
-                self.pins = Z80_SET_DATA((self.pins), int(data & 0xFF))
-            elif (self.pins & Z80_WR):  # Memory write
-                data = self.z80.data
-                self.memory.write(addr, data)
-        elif (self.pins & Z80_IORQ):  # IO request
-            addr = self.z80.addr
-            if (self.pins & Z80_M1):  # Interrupt acknowledge
-                self.pins = Z80_SET_DATA((self.pins), 0xFF)
-            else:
-                if (self.pins & Z80_RD):  # IO read
-                    if self.io_bus is not None:
-                        data = self.io_bus.read(addr)
-                    else:
-                        data = 0xFF  # Default if no IO bus
-                    self.pins = Z80_SET_DATA((self.pins), int(data & 0xFF))
-                elif (self.pins & Z80_WR):  # IO write
-                    data = self.z80.data
-                    if self.io_bus is not None:
-                        self.io_bus.write(addr, data)
+        # The address and data buses are decoded inline rather than through
+        # the Z80_GET_*/Z80_SET_DATA helpers, saving a call per access
+        pins = self.pins
+        if pins & Z80_MREQ:  # Memory request
+            addr = pins & Z80_ADDR_MASK
+            if pins & Z80_RD:  # Memory read
+                self.pins = (pins & ~Z80_DATA_MASK) | (int(self.memory.ram[addr]) << Z80_PIN_D0)
+            elif pins & Z80_WR:  # Memory write
+                self.memory.ram[addr] = (pins & Z80_DATA_MASK) >> Z80_PIN_D0
+        elif pins & Z80_IORQ:  # IO request
+            if pins & Z80_M1:  # Interrupt acknowledge
+                self.pins = pins | Z80_DATA_MASK
+            elif pins & Z80_RD:  # IO read
+                if self.io_bus is not None:
+                    data = self.io_bus.read(pins & Z80_ADDR_MASK)
+                else:
+                    data = 0xFF  # Default if no IO bus
+                self.pins = (pins & ~Z80_DATA_MASK) | ((data & 0xFF) << Z80_PIN_D0)
+            elif pins & Z80_WR:  # IO write
+                if self.io_bus is not None:
+                    self.io_bus.write(pins & Z80_ADDR_MASK, (pins & Z80_DATA_MASK) >> Z80_PIN_D0)
     
     def interrupt(self, status=True):
         """Set or clear the interrupt pin"""
@@ -379,47 +688,6 @@ class CPU:
     def set_pc(self, addr):
         """Set the program counter to a specific address"""
         self.pins = self.z80.prefetch(addr)
-        
-    def set_register_i(self, value):
-        """Set Z80 I register"""
-        self.z80.i = value
-        
-    def set_register_r(self, value):
-        """Set Z80 R register"""
-        self.z80.r = value
-        
-    def set_register_iff2(self, value):
-        """Set Z80 IFF2 flag (enable/disable interrupts)"""
-        self.z80.iff2 = value
-        
-    def set_register_im(self, value):
-        """Set Z80 interrupt mode (0/1/2)"""
-        self.z80.im = value
-        
-    def set_register_pair(self, pair_name, value):
-        """Set a register pair (HL, DE, BC, AF, IX, IY, SP)"""
-        if pair_name == 'hl':
-            self.z80.hl = value
-        elif pair_name == 'de':
-            self.z80.de = value
-        elif pair_name == 'bc':
-            self.z80.bc = value
-        elif pair_name == 'af':
-            self.z80.af = value
-        elif pair_name == 'ix':
-            self.z80.ix = value
-        elif pair_name == 'iy':
-            self.z80.iy = value
-        elif pair_name == 'sp':
-            self.z80.sp = value
-        elif pair_name == 'hl_alt' or pair_name == 'hl2':
-            self.z80.hl_prime = value
-        elif pair_name == 'de_alt' or pair_name == 'de2':
-            self.z80.de_prime = value
-        elif pair_name == 'bc_alt' or pair_name == 'bc2':
-            self.z80.bc_prime = value
-        elif pair_name == 'af_alt' or pair_name == 'af2':
-            self.z80.af_prime = value
 
 
 # -----------------------------------------------------------------------------
@@ -459,6 +727,11 @@ class Keyboard(IODevice):
         # In ZX Spectrum, 0=pressed, 1=not pressed, so initialize all to 0xFF (not pressed)
         self.rows = [0xFF] * 8
         
+        # Result of reading the keyboard for each high address byte, rebuilt
+        # only after a key has changed
+        self.read_lut = [0xFF] * 256
+        self.read_lut_dirty = False
+        
         # Define mapping from SDL scancodes to ZX Spectrum keyboard positions
         # Format: SDL_SCANCODE: (row, bit_mask)
         self.key_map = {
@@ -526,6 +799,7 @@ class Keyboard(IODevice):
             row, bit_mask = self.key_map[scancode]
             # Clear the bit (0 = pressed in ZX Spectrum)
             self.rows[row] &= ~bit_mask
+            self.read_lut_dirty = True
     
     def release(self, scancode):
         """Handle key release event - set the corresponding bit to 1"""
@@ -533,6 +807,7 @@ class Keyboard(IODevice):
             row, bit_mask = self.key_map[scancode]
             # Set the bit (1 = not pressed in ZX Spectrum)
             self.rows[row] |= bit_mask
+            self.read_lut_dirty = True
     
     def read_row(self, row):
         """Read the state of a specific keyboard row"""
@@ -552,20 +827,28 @@ class Keyboard(IODevice):
         - If multiple bits are clear, then multiple rows are read
           and the results are combined with bitwise AND
         """
-        # We only care about the high byte for keyboard reading
-        high_byte = (addr >> 8) & 0xFF
-        
-        # Initialize result with all 1s (no keys pressed)
-        result = 0xFF
+        if self.read_lut_dirty:
+            self.update_read_lut()
         
-        # For each cleared bit in the high byte, read the corresponding row
-        for row in range(8):
-            # Check if this row's bit is cleared in the high byte
-            if not (high_byte & (1 << row)):
-                # If the bit is cleared, read this row and combine with result
-                result &= self.rows[row]
+        # We only care about the high byte for keyboard reading
+        return self.read_lut[(addr >> 8) & 0xFF]
+    
+    def update_read_lut(self):
+        """Recombine the rows for every possible high address byte"""
+        for high_byte in range(256):
+            # Initialize result with all 1s (no keys pressed)
+            result = 0xFF
+            
+            # For each cleared bit in the high byte, read the corresponding row
+            for row in range(8):
+                # Check if this row's bit is cleared in the high byte
+                if not (high_byte & (1 << row)):
+                    # If the bit is cleared, read this row and combine with result
+                    result &= self.rows[row]
+            
+            self.read_lut[high_byte] = result
         
-        return result
+        self.read_lut_dirty = False
 
 
 # -----------------------------------------------------------------------------
@@ -582,39 +865,38 @@ class ULA(IODevice):
     FLASH_RATE = 16
     INTERRUPT_DURATION = 32
     
-    def __init__(self, memory, crt, cpu):
+    def __init__(self, memory, crt, cpu, race_beam=False):
         super().__init__()
         self.memory = memory
         self.crt = crt
         self.cpu = cpu
-        self.border_color = 0
         self.keyboard = Keyboard()  # Create keyboard instance
         
-        # Current position tracking for beam simulation
-        self.line = 0           # Current scanline (0-311)
-        self.line_cycle = 0     # Current cycle within line (0-223)
-        self.current_column = 0
-        self.flash_flipper = self.FLASH_RATE
+        # When racing the beam, each column is drawn at the T-state the beam
+        # reaches it; otherwise the whole field is drawn once at its end.
+        self.race_beam = race_beam
+        
+        # Border color latched at the start of each line for the field renderer
+        self.border_lines = np.zeros(self.FIELD_LINES, dtype=np.uint8)
+        
+        # Beam position and the rest of the per-T-state state, kept in one
+        # array (indexed by the ULA_* slots) that the compiled runner updates
+        self.state = np.zeros(ULA_STATE_SIZE, dtype=np.int32)
+        self.state[ULA_FLASH_FLIPPER] = self.FLASH_RATE
     
     def read(self, addr):
         """Read from ULA ports (0xFE)"""
         # The ULA handles both keyboard input and other I/O
         # For keyboard reads, the high byte of the address selects which rows to read
         
-        # Check the low byte - ULA responds to port addresses with bit 0 clear
-        if (addr & 0x01) == 0:
-            # Get keyboard state
-            keyboard_state = self.keyboard.read(addr)
-            
-            # The lower 5 bits come from the keyboard (bits 0-4)
-            # The upper 3 bits (bits 5-7) are always 1
-            # So we need to clear bits 5-7 from keyboard_state and then set them to 1
-            result = (keyboard_state & 0x1F) | 0xE0
-            
-            return result
+        # The ULA responds to port addresses with bit 0 clear; the IO bus
+        # (port mask 0x0001) only routes those ports here, just like writes
+        keyboard_state = self.keyboard.read(addr)
         
-        # Default return for non-keyboard reads
-        return 0xFF
+        # The lower 5 bits come from the keyboard (bits 0-4)
+        # The upper 3 bits (bits 5-7) are always 1
+        # So we need to clear bits 5-7 from keyboard_state and then set them to 1
+        return (keyboard_state & 0x1F) | 0xE0
     
     def write(self, addr, value):
         """Write to ULA ports (0xFE)"""
@@ -623,80 +905,82 @@ class ULA(IODevice):
     
     def tick(self):
         """Process one T-state of ULA operation"""
-        # First tick the CPU
-        self.cpu.tick()
-        
-        # Check if we're in the visible (non-blanking) area
-        
-        # Precalculate values used in conditionals
-        visible = (self.line >= CRT.TOP_BLANKING and 
-                  self.line < (CRT.FIELD_LINES - CRT.BOTTOM_BLANKING))
-        active_display_area = self.line_cycle < (CRT.COLUMNS * 4)
-        column_update_needed = self.line_cycle % 4 == 0
-                  
-        # Combine all conditions to avoid unnecessary checks
-        if visible and active_display_area and column_update_needed:
-            self.current_column = self.line_cycle // 4
-            
-            # Use the fully optimized JIT function for all screen updates
-            screen_update_full_jit(
-                self.crt.pixels, self.memory.ram,
-                self.line, self.current_column, self.border_color,
-                CRT.TOP_BLANKING, CRT.FIELD_LINES - CRT.BOTTOM_BLANKING, CRT.TOTAL_WIDTH, CRT.CRT_LINES,
+        self.run(1)
+    
+    def run(self, t_states):
+        """Run the CPU and ULA for the given number of T-states"""
+        cpu = self.cpu
+        crt = self.crt
+        done = 0
+        while done < t_states:
+            pins, ran, reason = ula_run_jit(
+                cpu.z80_tick, cpu.state_addr, np.uint64(cpu.pins), t_states - done,
+                self.state, self.memory.ram, self.border_lines, self.race_beam,
+                crt.plane_words, self.memory.display_addr_lut, self.memory.attr_addr_lut,
+                CRT.TOP_BLANKING, CRT.VISIBLE_LINES, CRT.TOTAL_WIDTH,
                 self.SCREEN_START_LINE, self.SCREEN_HEIGHT, self.SCREEN_START_COLUMN, self.SCREEN_WIDTH_BYTES,
-                self.crt.odd_field, self.crt.flash_inverted, self.crt.rgba_color_table
+                crt.odd_field, crt.flash_inverted, crt.rgb_color_table, crt.pixel_mask_lut, crt.phosphor,
+                T_STATES_PER_LINE, self.FIELD_LINES, self.BORDER_T_STATES, self.INTERRUPT_DURATION
             )
+            cpu.pins = cpu.z80.pins = int(pins)
+            done += ran
+            
+            if reason == RUN_IO:
+                # Process the IO transaction the CPU is waiting on
+                cpu.transact()
+            elif reason == RUN_FIELD_END:
+                self.end_field()
+    
+    def end_field(self):
+        """Finish off a field once the beam has scanned its last line"""
+        # Draw the finished field unless it was drawn as the beam moved
+        if not self.race_beam:
+            self.render_field()
         
-        # Process memory and I/O transactions
-        self.cpu.transact()
+        self.state[ULA_FLASH_FLIPPER] -= 1
         
-        # Update position counters
-        self.line_cycle += 1
+        # Toggle flash state at the flash rate (16 frames)
+        if self.state[ULA_FLASH_FLIPPER] == 0:
+            self.state[ULA_FLASH_FLIPPER] = self.FLASH_RATE
+            self.crt.toggle_flash()
         
-        # Generate interrupts at the start of the frame
-        if self.line == 0 and self.line_cycle == self.BORDER_T_STATES:
-            # Generate CPU interrupt
-            self.cpu.interrupt(True)
-        elif self.line == 0 and self.line_cycle == self.BORDER_T_STATES + self.INTERRUPT_DURATION:
-            # End of interrupt
-            self.cpu.interrupt(False)
-            
-        # Check if we've reached the end of a line
-        if self.line_cycle >= T_STATES_PER_LINE:
-            self.line_cycle = 0
-            self.line += 1
-            
-            # Check if we've reached the end of a frame
-            if self.line >= self.FIELD_LINES:
-                self.line = 0
-                self.flash_flipper -= 1
-                
-                # Toggle flash state at the flash rate (16 frames)
-                if self.flash_flipper == 0:
-                    self.flash_flipper = self.FLASH_RATE
-                    self.crt.toggle_flash()
-                
-                # Toggle interlace field
-                self.crt.toggle_field()
+        # Toggle interlace field
+        self.crt.toggle_field()
+    
+    def render_field(self):
+        """Draw the whole visible field from screen memory in one pass"""
+        render_field_jit(
+            self.crt.plane_words, self.memory.ram,
+            self.memory.display_addr_lut, self.memory.attr_addr_lut, self.border_lines,
+            CRT.TOP_BLANKING, CRT.VISIBLE_LINES, CRT.TOTAL_WIDTH,
+            self.SCREEN_START_LINE, self.SCREEN_HEIGHT, self.SCREEN_START_COLUMN, self.SCREEN_WIDTH_BYTES,
+            self.crt.odd_field, self.crt.flash_inverted, self.crt.rgb_color_table,
+            self.crt.pixel_mask_lut, self.crt.phosphor
+        )
     
     def set_border_color(self, color):
         """Set the border color (0-7)"""
-        self.border_color = color & 0x07
+        self.state[ULA_BORDER_COLOR] = color & 0x07
         
     def get_border_color(self):
         """Get the current border color"""
-        return self.border_color
+        return int(self.state[ULA_BORDER_COLOR])
 
 
 # -----------------------------------------------------------------------------
 # System class: Manages the main event loop and timing
 class System:
-    # Chunk size for processing (in T-states)
-    CHUNK_SIZE = 13 * 8 * 224  # Approximately 13 character rows
+    # Chunk size for processing (in T-states): one whole frame, so each pass
+    # of the main loop polls events and presents the display once
+    CHUNK_SIZE = T_STATES_PER_FRAME
     
-    def __init__(self, debug=False):
+    # The 27-byte SNA header: I, HL', DE', BC', AF', HL, DE, BC, IY, IX,
+    # interrupt, R, AF, SP, interrupt mode and border colour
+    SNA_HEADER = struct.Struct('<B4H5HBB2HBB')
+    
+    def __init__(self, debug=False, race_beam=False, phosphor=False):
         # Initialize components
-        self.crt = CRT()
+        self.crt = CRT(phosphor=phosphor)
         self.memory = Memory()
         
         # Create IO bus for device handling
@@ -706,7 +990,7 @@ class System:
         self.cpu = CPU(self.memory, self.io_bus)
         
         # Create ULA and connect to the bus
-        self.ula = ULA(self.memory, self.crt, self.cpu)
+        self.ula = ULA(self.memory, self.crt, self.cpu, race_beam)
         
         # Add ULA to the IO bus with port mask 0x0001
         # This will make the ULA respond to port 0xFE
@@ -718,30 +1002,33 @@ class System:
         # FPS tracking variables
         self.frame_count = 0
         self.fps = 0.0
-        self.last_time = time.time()
-        self.fps_update_interval = 0.5
+        self.last_time_ns = time.monotonic_ns()
+        self.fps_update_interval_ns = 500_000_000  # 0.5 seconds
         
         # Refresh rate tracking variables
         self.refresh_rate = 0.0
-        self.last_refresh_time = time.time() # Initialize with current time
+        self.last_refresh_time_ns = time.monotonic_ns() # Initialize with current time
+        
+        # One event and reference to it, reused for every poll
+        self.event = sdl2.SDL_Event()
+        self.event_ref = ctypes.byref(self.event)
         
         # Do an initial refresh to display the screen immediately
         self.crt.refresh()
 
     def run(self):
         quit = False
-        event = sdl2.SDL_Event()
+        event = self.event
         
-        # Track both virtual and real time
-        start_time = time.time()
-        next_refresh_t_state = self.current_t_state + T_STATES_PER_FRAME
+        # Track both virtual and real time (integer nanoseconds)
+        start_ns = time.monotonic_ns()
         
-        # Initialize last_refresh_time here as well to align with start
-        self.last_refresh_time = start_time 
+        # Initialize last_refresh_time_ns here as well to align with start
+        self.last_refresh_time_ns = start_ns
         
         while not quit:
             # Process SDL events
-            while sdl2.SDL_PollEvent(ctypes.byref(event)) != 0:
+            while sdl2.SDL_PollEvent(self.event_ref) != 0:
                 if event.type == sdl2.SDL_QUIT:
                     quit = True
                 elif event.type == sdl2.SDL_KEYDOWN:
@@ -764,51 +1051,51 @@ class System:
                     self.ula.keyboard.release(scancode)
             
             # Process a chunk of emulation
-            target_t_state = self.current_t_state + self.CHUNK_SIZE
-            while self.current_t_state < target_t_state:
-                self.ula.tick()
-                self.current_t_state += 1
+            self.ula.run(self.CHUNK_SIZE)
+            self.current_t_state += self.CHUNK_SIZE
             
             # FPS calculation
-            current_time = time.time()
+            now_ns = time.monotonic_ns()
             self.frame_count += 1
             
             # Update FPS counter periodically
-            elapsed = current_time - self.last_time
-            if elapsed >= self.fps_update_interval:
-                self.fps = self.frame_count / elapsed
+            elapsed_ns = now_ns - self.last_time_ns
+            if elapsed_ns >= self.fps_update_interval_ns:
+                self.fps = self.frame_count * 1_000_000_000 / elapsed_ns
                 # Update title with both FPS and Refresh Rate
                 self.crt.set_title_stats(self.fps, self.refresh_rate) 
                 self.frame_count = 0
-                self.last_time = current_time
+                self.last_time_ns = now_ns
             
-            # Check if we need to refresh the display (emulated frame complete)
-            if self.current_t_state >= next_refresh_t_state:
-                self.crt.refresh()
-                
-                # Calculate actual refresh rate based on time between refreshes
-                now = time.time()
-                delta_refresh = now - self.last_refresh_time
-                self.refresh_rate = 1.0 / delta_refresh if delta_refresh > 0 else 0.0
-                self.last_refresh_time = now
-                
-                next_refresh_t_state += T_STATES_PER_FRAME
+            # Each chunk is a whole emulated frame, so refresh the display
+            self.crt.refresh()
+            
+            # Presenting takes a while, so read the clock again after it
+            now_ns = time.monotonic_ns()
+            
+            # Calculate actual refresh rate based on time between refreshes
+            delta_refresh_ns = now_ns - self.last_refresh_time_ns
+            self.refresh_rate = 1_000_000_000 / delta_refresh_ns if delta_refresh_ns > 0 else 0.0
+            self.last_refresh_time_ns = now_ns
             
-            # Sleep if we're ahead of real time
-            target_time = start_time + ((self.current_t_state * 1_000_000) / CLOCK_RATE / 1_000_000)
-            time_ahead = target_time - time.time()
+            # Sleep if we're ahead of real time. A Spectrum frame (19.968ms) is
+            # a little shorter than a 50Hz vsync, so when presenting blocks we
+            # are never ahead and vsync only smooths the presentation; when it
+            # doesn't block (hidden window, other refresh rate) this keeps time.
+            target_ns = start_ns + self.current_t_state * 1_000_000_000 // CLOCK_RATE
+            ahead_ns = target_ns - now_ns
             
-            if time_ahead > 0.001:  # More than 1ms ahead
-                time.sleep(time_ahead - 0.001)  # Leave 1ms margin
+            if ahead_ns > 1_000_000:  # More than 1ms ahead
+                time.sleep((ahead_ns - 1_000_000) / 1_000_000_000)  # Leave 1ms margin
     
     def load_scr(self, filename):
         """Load a .scr screen file"""
-        self.memory.load_from_file(filename, 0x4000, 6912)
+        self.memory.load_from_file(filename, 0x4000, FILE_SIZES["scr"])
         print(f"Screen file loaded: {filename}")
             
     def load_rom(self, filename):
         """Load a ROM file into memory at address 0x0000"""
-        self.memory.load_from_file(filename, 0x0000, 16384)  # 16KB ROM
+        self.memory.load_from_file(filename, 0x0000, FILE_SIZES["rom"])  # 16KB ROM
         print(f"ROM loaded: {filename}")
             
     def load_sna(self, filename):
@@ -828,154 +1115,176 @@ class System:
         27      49152 bytes  RAM dump 16384..65535
         """
         with open(filename, 'rb') as f:
-            # Set PC first
-            self.cpu.set_pc(0x0072)
-            
-            # Read data directly in the same order as the reference
-            # I register
-            i_reg = int.from_bytes(f.read(1), byteorder='little')
-            self.cpu.set_register_i(i_reg)
-            
-            # Alternate register set (HL', DE', BC', AF')
-            hl_alt = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('hl_alt', hl_alt)
-            
-            de_alt = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('de_alt', de_alt)
-            
-            bc_alt = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('bc_alt', bc_alt)
-            
-            af_alt = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('af_alt', af_alt)
-            
-            # Main register set (HL, DE, BC, IY, IX)
-            hl = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('hl', hl)
-            
-            de = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('de', de)
-            
-            bc = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('bc', bc)
-            
-            iy = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('iy', iy)
-            
-            ix = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('ix', ix)
-            
-            # Interrupt flag
-            interrupt_byte = int.from_bytes(f.read(1), byteorder='little')
-            iff2 = (interrupt_byte & 0x04) != 0
-            self.cpu.set_register_iff2(iff2)
-            
-            # IFF1 needs to be set as well for interrupts to work
-            # In Z80, interrupts are enabled when IFF1 is set
-            print(f"Setting interrupt flags: IFF2={iff2}, setting IFF1 to same value")
-            self.cpu.z80.iff1 = iff2  # Set IFF1 to same value as IFF2
-            
-            # R register
-            r_reg = int.from_bytes(f.read(1), byteorder='little')
-            self.cpu.set_register_r(r_reg)
-            
-            # AF and SP
-            af = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('af', af)
-            
-            sp = int.from_bytes(f.read(2), byteorder='little')
-            self.cpu.set_register_pair('sp', sp)
-            
-            # Interrupt mode
-            im = int.from_bytes(f.read(1), byteorder='little')
-            self.cpu.set_register_im(im)
-            
-            # Border color
-            border = int.from_bytes(f.read(1), byteorder='little') & 0x07
-            self.ula.set_border_color(border)
-            
-            # Load RAM directly
-            ram_data = f.read(49152)
-            if len(ram_data) < 49152:
+            # Check the size before touching the CPU or memory
+            file_size = os.fstat(f.fileno()).st_size
+            if file_size < self.SNA_HEADER.size:
+                raise RuntimeError(f"Invalid SNA file: not enough header data")
+            if file_size < FILE_SIZES["sna"]:
                 raise RuntimeError(f"Invalid SNA file: not enough memory data")
             
-            # Load into RAM
-            self.memory.ram[0x4000:0x10000] = np.frombuffer(ram_data, dtype=np.uint8)
+            header = f.read(self.SNA_HEADER.size)
+            
+            # Load RAM straight from the file, after the header
+            f.readinto(memoryview(self.memory.ram)[0x4000:0x10000])
+        
+        # Set PC first
+        self.cpu.set_pc(0x0072)
+        
+        # Unpack every header field at once
+        (i_reg, hl_alt, de_alt, bc_alt, af_alt, hl, de, bc, iy, ix,
+         interrupt_byte, r_reg, af, sp, im, border) = self.SNA_HEADER.unpack(header)
+        
+        # Every register goes straight to the Z80 properties
+        z80 = self.cpu.z80
+        
+        # I register
+        z80.i = i_reg
+        
+        # Alternate register set (HL', DE', BC', AF')
+        z80.hl_prime = hl_alt
+        z80.de_prime = de_alt
+        z80.bc_prime = bc_alt
+        z80.af_prime = af_alt
+        
+        # Main register set (HL, DE, BC, IY, IX)
+        z80.hl = hl
+        z80.de = de
+        z80.bc = bc
+        z80.iy = iy
+        z80.ix = ix
+        
+        # Interrupt flag
+        iff2 = (interrupt_byte & 0x04) != 0
+        z80.iff2 = iff2
+        
+        # IFF1 needs to be set as well for interrupts to work
+        # In Z80, interrupts are enabled when IFF1 is set
+        print(f"Setting interrupt flags: IFF2={iff2}, setting IFF1 to same value")
+        z80.iff1 = iff2  # Set IFF1 to same value as IFF2
+        
+        # R register
+        z80.r = r_reg
+        
+        # AF and SP
+        z80.af = af
+        z80.sp = sp
+        
+        # Interrupt mode
+        z80.im = im
+        
+        # Border color
+        self.ula.set_border_color(border & 0x07)
         print(f"SNA file loaded: {filename}")
 
 
+# File types that can be given on the command line, by extension
+FILE_TYPES = {".rom": "rom", ".sna": "sna", ".scr": "scr"}
+
+# The ROM loaded when none is given, kept alongside this script
+DEFAULT_ROM = os.path.join(os.path.dirname(os.path.abspath(__file__)), "48.rom")
+
+# The smallest file each type can be loaded from
+FILE_SIZES = {"rom": 16384, "sna": 49179, "scr": 6912}
+
+# Command line switches, and the System option each one turns on
+OPTION_FLAGS = {
+    "-d": "debug", "--debug": "debug",
+    "-b": "race_beam", "--race-beam": "race_beam",
+    "-p": "phosphor", "--phosphor": "phosphor",
+}
+
+
+def print_usage():
+    """Print command line help"""
+    print(f"Usage: {sys.argv[0]} [options] [filename...]")
+    print("Options:")
+    print("  -h, --help           Display command information")
+    print("  -d, --debug          Enable debugging output")
+    print("  -b, --race-beam      Draw the screen as the beam scans it (slower)")
+    print("  -p, --phosphor       Interlace fields with phosphor fade and bleed")
+    print("Available file formats:")
+    print(f"  .scr                 Screen data ({FILE_SIZES['scr']} bytes)")
+    print(f"  .rom                 System ROM ({FILE_SIZES['rom']} bytes)")
+    print(f"  .sna                 Snapshot file ({FILE_SIZES['sna']} bytes)")
+    print("Default ROM '48.rom' will be loaded if no ROM specified.")
+
+
 # -----------------------------------------------------------------------------
 # Main: Initializes SDL, runs the system, and handles any exceptions
 def main():
-    if sdl2.SDL_Init(sdl2.SDL_INIT_VIDEO) != 0:
-        print(f"SDL_Init Error: {sdl2.SDL_GetError().decode()}", file=sys.stderr)
-        return 1
-
-    # Parse command line arguments
-    rom_loaded = False
-    
-    # Process arguments that might affect system creation first
-    args = sys.argv[1:]
-    i = 0
-    while i < len(args):
-        arg = args[i]
-        if arg == "-d" or arg == "--debug":
-            debug_enabled = True
-            args.pop(i)
-        else:
-            i += 1
-    
-    # Create system
-    system = System()
+    # Help needs neither SDL nor an emulator, so answer it before either
+    if "-h" in sys.argv[1:] or "--help" in sys.argv[1:]:
+        print_usage()
+        return 0
     
-    # Track if we need to load files
+    # Sort the arguments into options and files in one pass
+    options = {}
     rom_file = None
     sna_file = None
     scr_files = []
+    for arg in sys.argv[1:]:
+        option = OPTION_FLAGS.get(arg)
+        if option is not None:
+            options[option] = True
+            continue
+        
+        file_type = FILE_TYPES.get(os.path.splitext(arg)[1].lower())
+        if file_type == "rom":
+            print(f"Found ROM file: {arg}")
+            rom_file = arg
+        elif file_type == "sna":
+            print(f"Found SNA snapshot file: {arg}")
+            sna_file = arg
+        elif file_type == "scr":
+            print(f"Found screen file: {arg}")
+            scr_files.append(arg)
+        else:
+            print(f"Unknown file type: {arg}", file=sys.stderr)
     
-    # Process command line arguments for loading files
-    if len(args) > 0:
-        for arg in args:
-            if arg == "-h" or arg == "--help":
-                print(f"Usage: {sys.argv[0]} [options] [filename...]")
-                print("Options:")
-                print("  -h, --help           Display command information")
-                print("  -d, --debug          Enable debugging output")
-                print("Available file formats:")
-                print("  .scr                 Screen data (6912 bytes)")
-                print("  .rom                 System ROM (16384 bytes)")
-                print("  .sna                 Snapshot file (49179 bytes)")
-                print("Default ROM '48.rom' will be loaded if no ROM specified.")
-                return 0
-            elif arg.endswith(".rom"):
-                print(f"Found ROM file: {arg}")
-                rom_file = arg
-            elif arg.endswith(".sna"):
-                print(f"Found SNA snapshot file: {arg}")
-                sna_file = arg
-            elif arg.endswith(".scr"):
-                print(f"Found screen file: {arg}")
-                scr_files.append(arg)
-            else:
-                print(f"Unknown file type: {arg}", file=sys.stderr)
+    # Make sure every file can be loaded before starting SDL
+    to_check = [(rom_file or DEFAULT_ROM, "rom")]
+    if sna_file:
+        to_check.append((sna_file, "sna"))
+    to_check.extend((scr_file, "scr") for scr_file in scr_files)
+    for filename, file_type in to_check:
+        try:
+            file_size = os.stat(filename).st_size
+        except OSError as e:
+            print(f"Cannot open {filename}: {e.strerror}", file=sys.stderr)
+            return 1
+        if file_size < FILE_SIZES[file_type]:
+            print(f"File too small: {filename} needs at least {FILE_SIZES[file_type]} bytes", file=sys.stderr)
+            return 1
     
-    # Load ROM first (either specified or default)
-    if rom_file:
-        print(f"Loading ROM file: {rom_file}")
-        system.load_rom(rom_file)
-    else:
-        print("Loading default ROM: 48.rom")
-        system.load_rom("48.rom")
+    if sdl2.SDL_Init(sdl2.SDL_INIT_VIDEO) != 0:
+        print(f"SDL_Init Error: {sdl2.SDL_GetError().decode()}", file=sys.stderr)
+        return 1
     
-    # Then load snapshot if available
-    if sna_file:
-        print(f"Loading SNA snapshot file: {sna_file}")
-        system.load_sna(sna_file)
+    # Create system
+    system = System(**options)
     
-    # Finally load any screen files
-    for scr_file in scr_files:
-        print(f"Loading screen file: {scr_file}")
-        system.load_scr(scr_file)
+    # Don't start a machine that failed to load
+    try:
+        # Load ROM first (either specified or default)
+        if rom_file:
+            print(f"Loading ROM file: {rom_file}")
+            system.load_rom(rom_file)
+        else:
+            print(f"Loading default ROM: {DEFAULT_ROM}")
+            system.load_rom(DEFAULT_ROM)
+        
+        # Then load snapshot if available
+        if sna_file:
+            print(f"Loading SNA snapshot file: {sna_file}")
+            system.load_sna(sna_file)
+        
+        # Finally load any screen files
+        for scr_file in scr_files:
+            print(f"Loading screen file: {scr_file}")
+            system.load_scr(scr_file)
+    except (OSError, RuntimeError) as e:
+        print(f"Load Error: {e}", file=sys.stderr)
+        return 1
     
     system.run()
     
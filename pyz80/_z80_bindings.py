@@ -82,8 +82,7 @@ Z80_WAIT = (1 << Z80_PIN_WAIT)
 Z80_RFSH = (1 << Z80_PIN_RFSH)
 Z80_IEIO = (1 << Z80_PIN_IEIO)
 Z80_RETI = (1 << Z80_PIN_RETI)
-# WARNING: Could not evaluate: Z80_CTRL_PIN_MASK = Z80_M1 | Z80_MREQ | Z80_IORQ | Z80_RD | Z80_WR | Z80_RFSH
-Z80_CTRL_PIN_MASK = "Z80_M1 | Z80_MREQ | Z80_IORQ | Z80_RD | Z80_WR | Z80_RFSH" # C EXPR: Z80_M1|Z80_MREQ|Z80_IORQ|Z80_RD|Z80_WR|Z80_RFSH
+Z80_CTRL_PIN_MASK = 17699962880 # Parsed from: Z80_M1|Z80_MREQ|Z80_IORQ|Z80_RD|Z80_WR|Z80_RFSH
 Z80_PIN_MASK = (1 << 40)
 Z80_CF = (1 << 0)
 Z80_NF = (1 << 1)
@@ -94,68 +93,37 @@ Z80_HF = (1 << 4)
 Z80_YF = (1 << 5)
 Z80_ZF = (1 << 6)
 Z80_SF = (1 << 7)
-# WARNING: Could not evaluate: Z80_DDFD_M1_T2 = 1685
-Z80_DDFD_M1_T2 = "1685" # C EXPR: 1685
-# WARNING: Could not evaluate: Z80_DDFD_M1_T3 = 1686
-Z80_DDFD_M1_T3 = "1686" # C EXPR: 1686
-# WARNING: Could not evaluate: Z80_DDFD_M1_T4 = 1687
-Z80_DDFD_M1_T4 = "1687" # C EXPR: 1687
-# WARNING: Could not evaluate: Z80_DDFD_D_T1 = 1688
-Z80_DDFD_D_T1 = "1688" # C EXPR: 1688
-# WARNING: Could not evaluate: Z80_DDFD_D_T2 = 1689
-Z80_DDFD_D_T2 = "1689" # C EXPR: 1689
-# WARNING: Could not evaluate: Z80_DDFD_D_T3 = 1690
-Z80_DDFD_D_T3 = "1690" # C EXPR: 1690
-# WARNING: Could not evaluate: Z80_DDFD_D_T4 = 1691
-Z80_DDFD_D_T4 = "1691" # C EXPR: 1691
-# WARNING: Could not evaluate: Z80_DDFD_D_T5 = 1692
-Z80_DDFD_D_T5 = "1692" # C EXPR: 1692
-# WARNING: Could not evaluate: Z80_DDFD_D_T6 = 1693
-Z80_DDFD_D_T6 = "1693" # C EXPR: 1693
-# WARNING: Could not evaluate: Z80_DDFD_D_T7 = 1694
-Z80_DDFD_D_T7 = "1694" # C EXPR: 1694
-# WARNING: Could not evaluate: Z80_DDFD_D_T8 = 1695
-Z80_DDFD_D_T8 = "1695" # C EXPR: 1695
-# WARNING: Could not evaluate: Z80_DDFD_LDHLN_WR_T1 = 1696
-Z80_DDFD_LDHLN_WR_T1 = "1696" # C EXPR: 1696
-# WARNING: Could not evaluate: Z80_DDFD_LDHLN_WR_T2 = 1697
-Z80_DDFD_LDHLN_WR_T2 = "1697" # C EXPR: 1697
-# WARNING: Could not evaluate: Z80_DDFD_LDHLN_WR_T3 = 1698
-Z80_DDFD_LDHLN_WR_T3 = "1698" # C EXPR: 1698
-# WARNING: Could not evaluate: Z80_DDFD_LDHLN_OVERLAPPED = 1699
-Z80_DDFD_LDHLN_OVERLAPPED = "1699" # C EXPR: 1699
-# WARNING: Could not evaluate: Z80_CB_M1_T2 = 1700
-Z80_CB_M1_T2 = "1700" # C EXPR: 1700
-# WARNING: Could not evaluate: Z80_CB_M1_T3 = 1701
-Z80_CB_M1_T3 = "1701" # C EXPR: 1701
-# WARNING: Could not evaluate: Z80_CB_M1_T4 = 1702
-Z80_CB_M1_T4 = "1702" # C EXPR: 1702
-# WARNING: Could not evaluate: Z80_ED_M1_T2 = 1703
-Z80_ED_M1_T2 = "1703" # C EXPR: 1703
-# WARNING: Could not evaluate: Z80_ED_M1_T3 = 1704
-Z80_ED_M1_T3 = "1704" # C EXPR: 1704
-# WARNING: Could not evaluate: Z80_ED_M1_T4 = 1705
-Z80_ED_M1_T4 = "1705" # C EXPR: 1705
-# WARNING: Could not evaluate: Z80_M1_T2 = 1706
-Z80_M1_T2 = "1706" # C EXPR: 1706
-# WARNING: Could not evaluate: Z80_M1_T3 = 1707
-Z80_M1_T3 = "1707" # C EXPR: 1707
-# WARNING: Could not evaluate: Z80_M1_T4 = 1708
-Z80_M1_T4 = "1708" # C EXPR: 1708
-# WARNING: Could not evaluate: Z80_CB_STEP = 1612
-Z80_CB_STEP = "1612" # C EXPR: 1612
-# WARNING: Could not evaluate: Z80_CBHL_STEP = 1613
-Z80_CBHL_STEP = "1613" # C EXPR: 1613
-# WARNING: Could not evaluate: Z80_DDFDCB_STEP = 1621
-Z80_DDFDCB_STEP = "1621" # C EXPR: 1621
-# WARNING: Could not evaluate: Z80_INT_IM0_STEP = 1636
-Z80_INT_IM0_STEP = "1636" # C EXPR: 1636
-# WARNING: Could not evaluate: Z80_INT_IM1_STEP = 1642
-Z80_INT_IM1_STEP = "1642" # C EXPR: 1642
-# WARNING: Could not evaluate: Z80_INT_IM2_STEP = 1655
-Z80_INT_IM2_STEP = "1655" # C EXPR: 1655
-# WARNING: Could not evaluate: Z80_NMI_STEP = 1674
-Z80_NMI_STEP = "1674" # C EXPR: 1674
+Z80_DDFD_M1_T2 = 1685 # Parsed from: 1685
+Z80_DDFD_M1_T3 = 1686 # Parsed from: 1686
+Z80_DDFD_M1_T4 = 1687 # Parsed from: 1687
+Z80_DDFD_D_T1 = 1688 # Parsed from: 1688
+Z80_DDFD_D_T2 = 1689 # Parsed from: 1689
+Z80_DDFD_D_T3 = 1690 # Parsed from: 1690
+Z80_DDFD_D_T4 = 1691 # Parsed from: 1691
+Z80_DDFD_D_T5 = 1692 # Parsed from: 1692
+Z80_DDFD_D_T6 = 1693 # Parsed from: 1693
+Z80_DDFD_D_T7 = 1694 # Parsed from: 1694
+Z80_DDFD_D_T8 = 1695 # Parsed from: 1695
+Z80_DDFD_LDHLN_WR_T1 = 1696 # Parsed from: 1696
+Z80_DDFD_LDHLN_WR_T2 = 1697 # Parsed from: 1697
+Z80_DDFD_LDHLN_WR_T3 = 1698 # Parsed from: 1698
+Z80_DDFD_LDHLN_OVERLAPPED = 1699 # Parsed from: 1699
+Z80_CB_M1_T2 = 1700 # Parsed from: 1700
+Z80_CB_M1_T3 = 1701 # Parsed from: 1701
+Z80_CB_M1_T4 = 1702 # Parsed from: 1702
+Z80_ED_M1_T2 = 1703 # Parsed from: 1703
+Z80_ED_M1_T3 = 1704 # Parsed from: 1704
+Z80_ED_M1_T4 = 1705 # Parsed from: 1705
+Z80_M1_T2 = 1706 # Parsed from: 1706
+Z80_M1_T3 = 1707 # Parsed from: 1707
+Z80_M1_T4 = 1708 # Parsed from: 1708
+Z80_CB_STEP = 1612 # Parsed from: 1612
+Z80_CBHL_STEP = 1613 # Parsed from: 1613
+Z80_DDFDCB_STEP = 1621 # Parsed from: 1621
+Z80_INT_IM0_STEP = 1636 # Parsed from: 1636
+Z80_INT_IM1_STEP = 1642 # Parsed from: 1642
+Z80_INT_IM2_STEP = 1655 # Parsed from: 1655
+Z80_NMI_STEP = 1674 # Parsed from: 1674
 
 # --- Pin Access Helper Functions (translated from C macros) ---
 def Z80_MAKE_PINS(ctrl, addr, data):
@@ -170,8 +138,11 @@ def Z80_SET_ADDR(p, a):
 def Z80_GET_DATA(p):
     return (p >> Z80_PIN_D0) & 0xFF
 
+# Mask that clears the data bus, worked out once rather than per call
+_Z80_DATA_CLEAR = ~(0xFF << Z80_PIN_D0)
+
 def Z80_SET_DATA(p, d):
-    return (p & ~(0xFF << Z80_PIN_D0)) | ((d & 0xFF) << Z80_PIN_D0)
+    return (p & _Z80_DATA_CLEAR) | ((d & 0xFF) << Z80_PIN_D0)
 
 # --- Library Function Prototypes ---
 def setup_prototypes(lib):
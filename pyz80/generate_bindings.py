@@ -168,6 +168,9 @@ def generate_bindings():
 
     constants = {}
     aliases = {}
+    # Values of the constants parsed so far, for evaluating later defines;
+    # grown as each one is parsed rather than rebuilt for every line
+    eval_context = {}
 
     for line in header_content.splitlines():
         line = line.strip()
@@ -177,6 +180,7 @@ def generate_bindings():
         if m:
             name, value = m.groups()
             constants[name] = int(value)
+            eval_context[name] = int(value)
             py_code.append(f"{name} = {value}")
             continue
 
@@ -185,6 +189,8 @@ def generate_bindings():
         if m:
             name, _, pin_name = m.groups()
             constants[name] = f"(1 << {pin_name})" # Store expression
+            if pin_name in eval_context:
+                eval_context[name] = 1 << eval_context[pin_name]
             py_code.append(f"{name} = {constants[name]}")
             continue
 
@@ -194,6 +200,7 @@ def generate_bindings():
             name, value_expr = m.groups()
             value = eval(value_expr) # Evaluate simple (1<<n)
             constants[name] = value
+            eval_context[name] = value
             py_code.append(f"{name} = {value} # {value_expr}")
             continue
 
@@ -202,6 +209,8 @@ def generate_bindings():
         if m:
             alias, original = m.groups()
             aliases[alias] = original
+            if original in eval_context:
+                eval_context[alias] = eval_context[original]
             py_code.append(f"{alias} = {original}")
             continue
 
@@ -215,9 +224,9 @@ def generate_bindings():
                     # Try to evaluate if it looks simple, otherwise store string
                     py_expr = parse_c_expr(expr)
                     # Evaluate in a context with already defined constants
-                    eval_context = {k: (eval(v) if isinstance(v, str) else v) for k, v in constants.items()}
-                    value = eval(py_expr, eval_context)
+                    value = eval(py_expr, {"__builtins__": {}}, eval_context)
                     constants[name] = value
+                    eval_context[name] = value
                     py_code.append(f"{name} = {value} # Parsed from: {expr}")
                 except Exception:
                      # Store as string if evaluation fails (might be complex)
@@ -241,8 +250,11 @@ def generate_bindings():
         "def Z80_GET_DATA(p):",
         f"    return (p >> Z80_PIN_D0) & 0xFF", # Use defined pin offset
         "",
+        "# Mask that clears the data bus, worked out once rather than per call",
+        "_Z80_DATA_CLEAR = ~(0xFF << Z80_PIN_D0)",
+        "",
         "def Z80_SET_DATA(p, d):",
-        f"    return (p & ~(0xFF << Z80_PIN_D0)) | ((d & 0xFF) << Z80_PIN_D0)",
+        f"    return (p & _Z80_DATA_CLEAR) | ((d & 0xFF) << Z80_PIN_D0)",
         "",
         "# --- Library Function Prototypes ---",
         "def setup_prototypes(lib):",
@@ -97,6 +97,12 @@ if z80_lib is None:
 # --- Setup function prototypes using the generated function ---
 setup_prototypes(z80_lib)
 
+# Entry points called every cycle or instruction, bound once so each call
+# skips the lookup on the library object
+_z80_tick = z80_lib.z80_tick
+_z80_prefetch = z80_lib.z80_prefetch
+_z80_opdone = z80_lib.z80_opdone
+
 # --- The Nice Python Class Wrapper (Now Simpler!) ---
 class Z80:
     def __init__(self):
@@ -111,16 +117,12 @@ class Z80:
 
         # 3. Get a pointer to this buffer, properly cast for C functions
         #    We store the pointer for convenience, but the buffer itself keeps memory alive.
-        self._cpu_state_ptr = ctypes.cast(self._cpu_state_buffer, ctypes.POINTER(z80_t))
+        #    Use this internally whenever you need to pass the state to C; it is
+        #    a plain attribute so every call into the library reads it directly.
+        self._state_ptr = ctypes.cast(self._cpu_state_buffer, ctypes.POINTER(z80_t))
 
         # 4. Call the C init function, passing the correctly typed pointer
-        self.pins = z80_lib.z80_init(self._cpu_state_ptr)
-
-    # Use this internally whenever you need to pass the state to C
-    @property
-    def _state_ptr(self):
-        # Optional: Add checks? Maybe not needed if init succeeded.
-        return self._cpu_state_ptr
+        self.pins = z80_lib.z80_init(self._state_ptr)
 
     
     
@@ -130,12 +132,12 @@ class Z80:
     def tick(self, pins_in=None):
         """Performs one Z80 clock cycle."""
         current_pins = pins_in if pins_in is not None else self.pins
-        self.pins = z80_lib.z80_tick(self._state_ptr, current_pins)
+        self.pins = _z80_tick(self._state_ptr, current_pins)
         return self.pins
 
     def prefetch(self, new_pc):
         """Forces the CPU to start fetching instructions from new_pc."""
-        self.pins = z80_lib.z80_prefetch(self._state_ptr, new_pc)
+        self.pins = _z80_prefetch(self._state_ptr, new_pc)
         # Alternatively, if you add z80_set_pc:
         # z80_lib.z80_set_pc(self._state_ptr, new_pc)
         # self.pins = z80_lib.z80_prefetch(self._state_ptr, new_pc) # Still might need prefetch logic
@@ -143,7 +145,7 @@ class Z80:
 
     def is_opdone(self):
         """Checks if the last instruction has completed."""
-        return z80_lib.z80_opdone(self._state_ptr)
+        return _z80_opdone(self._state_ptr)
 
     # --- Pin Access ---
     # Use the generated helper functions directly
@@ -320,6 +322,71 @@ class Z80:
 
 
 # --- Example Usage (mostly unchanged, but now more robust) ---
+def run_example(cpu, memory, max_ticks):
+    """Clock the CPU against memory until it halts or max_ticks run out.
+
+    The loop lives in a function, with the names it uses every cycle bound
+    to locals, so they are fast local loads rather than global lookups.
+    """
+    tick = cpu.tick
+    set_data = Z80_SET_DATA
+    get_data = Z80_GET_DATA
+    MREQ, IORQ, RD, WR, M1, HALT = Z80_MREQ, Z80_IORQ, Z80_RD, Z80_WR, Z80_M1, Z80_HALT
+
+    pins = cpu.pins # Get initial pins
+    halted = False
+    for i in range(max_ticks):
+        # --- CPU Tick ---
+        # Set pins high *before* tick if needed (e.g. WAIT, INT, NMI)
+        # Example: cpu.set_pins(Z80_INT)
+        pins = tick(pins)
+
+        # --- Peripheral/Memory Handling ---
+        # Test the pins returned by tick() directly; the is_*() and
+        # addr/data helpers cost a method call each, every cycle
+        if pins & MREQ:
+            addr = pins & 0xFFFF
+            if pins & RD:
+                data = memory[addr]
+                # print(f"Tick {i}: MREQ|RD Addr: {addr:04X} Data: {data:02X}")
+                pins = set_data(pins, data) # Put data on bus for *next* tick
+            elif pins & WR:
+                data = get_data(pins)
+                # print(f"Tick {i}: MREQ|WR Addr: {addr:04X} Data: {data:02X}")
+                memory[addr] = data
+        elif pins & IORQ:
+            addr = pins & 0xFFFF
+            if pins & M1: # Interrupt Acknowledge
+                print(f"Tick {i}: Interrupt Acknowledge! (Addr: {addr:04X})")
+                pins = set_data(pins, 0xFF) # Respond with RST 38h
+            elif pins & RD:
+                 # print(f"Tick {i}: IO RD Addr: {addr:04X}")
+                 pins = set_data(pins, 0x00) # Read 0 from any port
+            elif pins & WR:
+                 data = get_data(pins)
+                 print(f"Tick {i}: IO WR Addr: {addr:04X} Data: {data:02X}")
+                 # Handle IO write (e.g., print to console)
+
+        # --- Check CPU State ---
+        if pins & HALT:
+            print(f"Tick {i}: CPU Halted.")
+            halted = True
+            break # Stop simulation on HALT
+
+        # --- Post-Tick Pin Handling ---
+        # Clear pins that should only be active for one cycle externally?
+        # Example: pins = cpu.clear_pins(Z80_INT) # If INT was asserted externally
+        # The Z80 core itself drives MREQ, RD, WR etc. so don't clear those.
+
+        # Optional: Print state every op
+        # if cpu.is_opdone():
+        #    print(f"Tick {i}: Op Done. {cpu}")
+
+    print(f"Emulation finished after {i+1} ticks.")
+    if not halted and i == max_ticks - 1:
+        print("Warning: Reached max ticks limit.")
+
+
 if __name__ == "__main__":
     print("Initializing Z80...")
     cpu = Z80()
@@ -332,60 +399,9 @@ if __name__ == "__main__":
 
     print(f"Starting emulation loop...")
     print(f"Initial state: {cpu}")
-    pins = cpu.pins # Get initial pins
 
-    halted = False
-    max_ticks = 1000
     try:
-        for i in range(max_ticks):
-            # --- CPU Tick ---
-            # Set pins high *before* tick if needed (e.g. WAIT, INT, NMI)
-            # Example: cpu.set_pins(Z80_INT)
-            pins = cpu.tick(pins)
-
-            # --- Peripheral/Memory Handling ---
-            if cpu.is_mreq():
-                addr = cpu.addr
-                if cpu.is_rd():
-                    data = memory[addr]
-                    # print(f"Tick {i}: MREQ|RD Addr: {addr:04X} Data: {data:02X}")
-                    pins = Z80_SET_DATA(pins, data) # Put data on bus for *next* tick
-                elif cpu.is_wr():
-                    data = cpu.data # Use property getter
-                    # print(f"Tick {i}: MREQ|WR Addr: {addr:04X} Data: {data:02X}")
-                    memory[addr] = data
-            elif cpu.is_iorq():
-                addr = cpu.addr
-                if cpu.is_m1(): # Interrupt Acknowledge
-                    print(f"Tick {i}: Interrupt Acknowledge! (Addr: {addr:04X})")
-                    pins = Z80_SET_DATA(pins, 0xFF) # Respond with RST 38h
-                elif cpu.is_rd():
-                     # print(f"Tick {i}: IO RD Addr: {addr:04X}")
-                     pins = Z80_SET_DATA(pins, 0x00) # Read 0 from any port
-                elif cpu.is_wr():
-                     data = cpu.data
-                     print(f"Tick {i}: IO WR Addr: {addr:04X} Data: {data:02X}")
-                     # Handle IO write (e.g., print to console)
-
-            # --- Check CPU State ---
-            if cpu.is_halt():
-                print(f"Tick {i}: CPU Halted.")
-                halted = True
-                break # Stop simulation on HALT
-
-            # --- Post-Tick Pin Handling ---
-            # Clear pins that should only be active for one cycle externally?
-            # Example: pins = cpu.clear_pins(Z80_INT) # If INT was asserted externally
-            # The Z80 core itself drives MREQ, RD, WR etc. so don't clear those.
-
-            # Optional: Print state every op
-            # if cpu.is_opdone():
-            #    print(f"Tick {i}: Op Done. {cpu}")
-
-        print(f"Emulation finished after {i+1} ticks.")
-        if not halted and i == max_ticks - 1:
-            print("Warning: Reached max ticks limit.")
-
+        run_example(cpu, memory, max_ticks=1000)
     except KeyboardInterrupt:
         print("\nEmulation stopped by user.")
 
@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pyse import IODevice, IODeviceBus
+
+
+class Port(IODevice):
+    """Answers reads with a fixed value and records writes"""
+    def __init__(self, value):
+        self.value = value
+        self.written = []
+
+    def read(self, addr):
+        return self.value
+
+    def write(self, addr, value):
+        self.written.append((addr, value))
+
+
+def test_wide_mask_device_answers_on_full_address():
+    bus = IODeviceBus()
+    ula = Port(0x1F)
+    paging = Port(0x42)
+    bus.add_device(0x0001, ula)
+    bus.add_device(0x8002, paging)
+
+    # 0x7FFD: A15 and A1 low, A0 high, so only the paging port decodes it
+    assert bus.read(0x7FFD) == 0x42
+    bus.write(0x7FFD, 0x10)
+    assert paging.written == [(0x7FFD, 0x10)]
+
+    # A15 high: same low byte, but the paging port no longer answers
+    assert bus.read(0xFFFD) == 0xFF
+
+    # The ULA still answers on any even port
+    assert bus.read(0xFEFE) == 0x1F
+    assert bus.read(0x7FFC) == 0x1F
+
+
+def test_first_device_added_wins():
+    bus = IODeviceBus()
+    paging = Port(0x42)
+    ula = Port(0x1F)
+    bus.add_device(0x8002, paging)
+    bus.add_device(0x0001, ula)
+
+    # 0x7FFC matches both masks; the paging port was added first
+    assert bus.read(0x7FFC) == 0x42
+    assert bus.read(0xFFFC) == 0x1F
+
+    # Added after the ULA claimed even ports, a wide device never wins there
+    late = Port(0x99)
+    bus.add_device(0x8002, late)
+    assert bus.read(0x7FFC) == 0x42
@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sdl2
+
+from pyse import Keyboard
+
+
+def scan_rows(rows, high_byte):
+    """The keyboard read before the lookup table: AND every selected row"""
+    result = 0xFF
+    for row in range(8):
+        if not (high_byte & (1 << row)):
+            result &= rows[row]
+    return result
+
+
+def check_reads(keyboard):
+    for high_byte in (0xFE, 0x7F, 0x00):
+        expected = scan_rows(keyboard.rows, high_byte)
+        assert keyboard.read((high_byte << 8) | 0xFE) == expected
+
+
+def test_read_matches_row_scan():
+    keyboard = Keyboard()
+    check_reads(keyboard)
+
+    # Z in row 0 and M in row 7
+    keyboard.press(sdl2.SDL_SCANCODE_Z)
+    keyboard.press(sdl2.SDL_SCANCODE_M)
+    check_reads(keyboard)
+    assert keyboard.read(0xFEFE) == 0xFD
+    assert keyboard.read(0x7FFE) == 0xFB
+    assert keyboard.read(0x00FE) == 0xF9
+
+    keyboard.release(sdl2.SDL_SCANCODE_Z)
+    check_reads(keyboard)
+    assert keyboard.read(0xFEFE) == 0xFF
+    assert keyboard.read(0x00FE) == 0xFB
+
+    keyboard.release(sdl2.SDL_SCANCODE_M)
+    check_reads(keyboard)
+    assert keyboard.read(0x00FE) == 0xFF